@@ -0,0 +1 @@
+# Lets pytest import the top-level modules of this project from the tests folder.
@@ -0,0 +1,18 @@
+# The pricing formula applied to PromoOpción's list prices:
+# the supplier's 23% discount, then a 40% margin on the sale price.
+SUPPLIER_DISCOUNT_FACTOR = 0.77
+SALE_MARGIN_FACTOR = 0.60
+
+
+def calculate_sale_price(base_price):
+    """
+    Converts a supplier list price into the Shopify sale price.
+    The factors are applied one after the other rather than folded into a single
+    multiplier, which would round differently for some prices.
+    :param base_price: The supplier's price, as a number or numeric string.
+    :return: The sale price as a float, or 0.0 if the price is not a valid number.
+    """
+    try:
+        return float(base_price) * SUPPLIER_DISCOUNT_FACTOR / SALE_MARGIN_FACTOR
+    except (ValueError, TypeError):
+        return 0.0
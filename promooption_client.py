@@ -1,6 +1,12 @@
 import os
 import requests
 import json
+import ijson
+import logging
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
 
 class PromoOptionClient:
     """
@@ -18,43 +24,74 @@ class PromoOptionClient:
         self.password = password
         self.headers = {
             "Content-Type": "application/json",
-            "Accept": "application/json"
+            "Accept": "application/json",
+            # The catalog is a large JSON document; urllib3 decodes it as the stream is read
+            "Accept-Encoding": "gzip, br"
         }
 
-    def get_all_products(self):
+        # Reuse TCP/TLS connections across calls instead of paying a new
+        # handshake for every request.
+        self.session = requests.Session()
+        retries = Retry(
+            total=5,
+            backoff_factor=0.5,
+            status_forcelist=[429, 502, 503, 504],
+            allowed_methods=None  # The catalog endpoint is a read-only POST, safe to retry
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=retries)
+        self.session.mount("https://", adapter)
+
+    def iter_products(self):
         """
-        Retrieves the full product catalog.
+        Streams the full product catalog, yielding one product at a time.
         This corresponds to the 'API de ficha técnica de Productos (JSON)'.
+        The response is parsed incrementally, so the whole catalog never sits in memory.
         """
         endpoint = f"{self.API_BASE_URL}/all-products"
         payload = {
             "user": self.user,
             "password": self.password
         }
+        status = {}
+
+        def watch_status(events):
+            # Note the top-level status fields while passing every event through to the item parser
+            for prefix, event, value in events:
+                if prefix in ("success", "respusta"):
+                    status[prefix] = value
+                yield prefix, event, value
 
         try:
             # Set a long timeout as this request can take a while
-            response = requests.post(endpoint, headers=self.headers, json=payload, timeout=120)
-            response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
+            with self.session.post(endpoint, headers=self.headers, json=payload, timeout=120, stream=True) as response:
+                response.raise_for_status()  # Raises an HTTPError for bad responses (4xx or 5xx)
+                # Let urllib3 undo any Content-Encoding, as response.raw is read directly
+                response.raw.decode_content = True
 
-            data = response.json()
+                events = watch_status(ijson.parse(response.raw, use_float=True))
+                yield from ijson.items(events, "response.item")
 
-            if data.get("success") is True:
-                return data.get("response", [])
-            else:
-                error_message = data.get("respusta", "Unknown API error")
+            if status.get("success") is not True:
+                error_message = status.get("respusta", "Unknown API error")
                 raise Exception(f"API returned an error: {error_message}")
 
         except requests.exceptions.RequestException as e:
-            print(f"An error occurred during the API request: {e}")
+            logger.error("An error occurred during the API request: %s", e)
             raise
 
+    def close(self):
+        """
+        Closes the underlying HTTP session and its pooled connections.
+        """
+        self.session.close()
+
 if __name__ == '__main__':
     """
     This block allows for direct testing of the client.
     It uses credentials passed as environment variables for security.
     """
-    print("Testing PromoOptionClient...")
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logger.info("Testing PromoOptionClient...")
 
     # In a real environment, these would be set securely.
     # For this test, we'll use the known credentials as a fallback.
@@ -62,22 +99,28 @@ if __name__ == '__main__':
     promo_password = os.getenv("PROMO_PASSWORD", "zzWZqF2ubPKCLSkttula")
 
     if not promo_user or not promo_password:
-        print("Error: PROMO_USER and PROMO_PASSWORD must be available for testing.")
+        logger.error("PROMO_USER and PROMO_PASSWORD must be available for testing.")
     else:
+        client = None
         try:
             client = PromoOptionClient(user=promo_user, password=promo_password)
-            print("Client initialized. Fetching all products...")
+            logger.info("Client initialized. Fetching all products...")
 
-            products = client.get_all_products()
+            product_count = 0
+            for product in client.iter_products():
+                if product_count == 0:
+                    logger.info("--- Sample Product (First Product) ---")
+                    # Using json.dumps for pretty printing
+                    logger.info("%s", json.dumps(product, indent=2, ensure_ascii=False))
+                    logger.info("--------------------------------------")
+                product_count += 1
 
-            print(f"Successfully fetched {len(products)} products.")
-            if products:
-                print("\n--- Sample Product (First Product) ---")
-                # Using json.dumps for pretty printing
-                print(json.dumps(products[0], indent=2, ensure_ascii=False))
-                print("--------------------------------------")
+            logger.info("Successfully fetched %s products.", product_count)
 
-            print("\nPromoOptionClient test successful!")
+            logger.info("PromoOptionClient test successful!")
 
         except Exception as e:
-            print(f"An error occurred during client testing: {e}")
+            logger.error("An error occurred during client testing: %s", e)
+        finally:
+            if client:
+                client.close()
@@ -1,12 +1,49 @@
 import os
+import sys
+import asyncio
+import itertools
+import logging
+import logging.handlers
+from queue import Queue
+from concurrent.futures import ThreadPoolExecutor
 from promooption_client import PromoOptionClient
 from shopify_client import ShopifyClient
+from pricing import calculate_sale_price
+
+logger = logging.getLogger(__name__)
+
+
+def configure_logging(level=logging.INFO):
+    """
+    Routes all log records through a queue to a background thread that writes them
+    to stdout, so the sync workers never block on console output.
+    :param level: The minimum level to log, as a logging constant or name.
+    :return: The started QueueListener; stop it before exiting to flush pending records.
+    """
+    log_queue = Queue(-1)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+
+    root_logger = logging.getLogger()
+    root_logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    root_logger.setLevel(level)
+    listener.start()
+    return listener
+
 
 class SyncManager:
     """
     Orchestrates the synchronization of products from PromoOpción to Shopify.
     """
 
+    # Maximum number of products processed against Shopify at the same time.
+    MAX_CONCURRENCY = 16
+    # Maximum number of downloaded products waiting to be processed.
+    QUEUE_SIZE = 512
+    # Number of supplier products read from the stream per hand-off to the queue.
+    READ_BATCH_SIZE = 50
+
     def __init__(self):
         """
         Initializes the clients needed for the synchronization.
@@ -18,89 +55,203 @@ class SyncManager:
 
         self.promo_client = PromoOptionClient(user=self.promo_user, password=self.promo_password)
         self.shopify_client = ShopifyClient(shop_url=self.shopify_domain, api_token=self.shopify_token)
-        print("SyncManager initialized with both clients.")
+        logger.info("SyncManager initialized with both clients.")
 
     def run_full_sync(self, product_limit=None):
         """
         Runs the full synchronization process.
         :param product_limit: An optional integer to limit the number of products processed for testing.
         """
-        print("\n--- Starting Full Product Sync ---")
+        asyncio.run(self._run_full_sync(product_limit))
+
+    async def _run_full_sync(self, product_limit=None):
+        """
+        Streams the supplier catalog into a bounded queue consumed by MAX_CONCURRENCY
+        workers, so the download overlaps with the Shopify snapshot and the Shopify work.
+        """
+        logger.info("--- Starting Full Product Sync ---")
+
+        # asyncio.to_thread runs on the loop's default executor, which only has min(32, cpu_count + 4)
+        # threads. Size it for every worker plus the producer so MAX_CONCURRENCY is the real limit.
+        executor = ThreadPoolExecutor(max_workers=self.MAX_CONCURRENCY + 1, thread_name_prefix="sync")
+        asyncio.get_running_loop().set_default_executor(executor)
 
         try:
-            # 1. Fetch all products from the supplier
-            print("Fetching products from PromoOpción...")
-            all_products = self.promo_client.get_all_products()
-            print(f"Found {len(all_products)} total products from supplier.")
+            # 1. Stream the products from the supplier
+            logger.info("Fetching products from PromoOpción...")
+            products = self.promo_client.iter_products()
 
             if product_limit:
-                print(f"Processing a limit of {product_limit} products for this run.")
-                products_to_process = all_products[:product_limit]
-            else:
-                products_to_process = all_products
-
-            # 2. Iterate through each product
-            for i, product_data in enumerate(products_to_process):
-                product_name = product_data.get('nombrePadre')
-                print(f"\n[{i+1}/{len(products_to_process)}] Processing: {product_name}")
+                logger.info("Processing a limit of %s products for this run.", product_limit)
+                products = itertools.islice(products, product_limit)
 
-                supplier_variants_active = {
-                    h['skuHijo']: h for h in product_data.get('hijos', []) if h.get('estatus') == '1'
-                }
-                if not supplier_variants_active:
-                    print(f"  Skipping '{product_name}' - no active variants.")
-                    continue
+            # 2. Load the current state of the PromoOpción products in Shopify once,
+            # grouping the variants of each product by SKU
+            async def load_snapshot():
+                logger.info("Loading PromoOpción variants from Shopify...")
+                variants_by_sku = await asyncio.to_thread(self.shopify_client.snapshot_promo_variants)
+                variants_by_product = {}
+                for sku, variant in variants_by_sku.items():
+                    variants_by_product.setdefault(variant['product_id'], {})[sku] = variant
+                return variants_by_sku, variants_by_product
 
-                # 3. Check for existing product in Shopify
+            async def process(i, product_data, variants_by_sku, variants_by_product):
                 # We check the first active variant's SKU to see if the product exists.
-                first_sku = next(iter(supplier_variants_active))
-                existing_product_info = self.shopify_client.find_product_variant_by_sku(first_sku)
-
-                if not existing_product_info:
-                    # 4a. CREATE new product
-                    print(f"  Product not found in Shopify. Creating '{product_name}'...")
-                    self.shopify_client.create_product(product_data)
-                else:
-                    # 4b. UPDATE existing product
-                    print(f"  Product found in Shopify (ID: {existing_product_info['product_id']}). Checking for updates...")
-                    shopify_variants = self.shopify_client.get_variants_for_product(existing_product_info['product_id'])
-                    shopify_variants_by_sku = {v.sku: v for v in shopify_variants}
-
-                    # Check for price updates on existing variants
-                    for sku, supplier_variant in supplier_variants_active.items():
-                        if sku in shopify_variants_by_sku:
-                            shopify_variant = shopify_variants_by_sku[sku]
-
-                            # Calculate new price
-                            try:
-                                base_price = float(supplier_variant.get('precio', 0))
-                                new_price = (base_price * 0.77) / 0.60
-                            except (ValueError, TypeError):
-                                new_price = 0.0
-
-                            # Compare and update price
-                            if abs(float(shopify_variant.price) - new_price) > 0.01:
-                                print(f"    - Updating price for SKU {sku}: {shopify_variant.price} -> {new_price:.2f}")
-                                self.shopify_client.update_variant_price(shopify_variant.id, new_price)
-
-                    # Check for variants to delete
-                    supplier_skus = set(supplier_variants_active.keys())
-                    shopify_skus = set(shopify_variants_by_sku.keys())
-                    skus_to_delete = shopify_skus - supplier_skus
-
-                    for sku in skus_to_delete:
-                        variant_to_delete = shopify_variants_by_sku[sku]
-                        print(f"    - Deleting discontinued variant SKU {sku} (ID: {variant_to_delete.id})")
-                        self.shopify_client.delete_product_variant(variant_to_delete.product_id, variant_to_delete.id)
+                existing_variant = variants_by_sku.get(self._first_active_sku(product_data))
+                shopify_variants_by_sku = variants_by_product[existing_variant['product_id']] if existing_variant else None
+
+                # The Shopify library is blocking, so the product is processed in a worker thread.
+                await asyncio.to_thread(self._process_product, i, product_data, shopify_variants_by_sku)
+
+            # 3. Pipe the products through a bounded queue: the producer keeps reading the
+            # catalog stream while the workers process products, and blocks when the queue is full.
+            queue = asyncio.Queue(maxsize=self.QUEUE_SIZE)
+
+            async def produce():
+                count = 0
+                while True:
+                    batch = await asyncio.to_thread(list, itertools.islice(products, self.READ_BATCH_SIZE))
+                    if not batch:
+                        # Wait until every queued product has been processed
+                        await queue.join()
+                        return count
+                    for product_data in batch:
+                        await queue.put((count, product_data))
+                        count += 1
+
+            async def work():
+                # Only the workers need the snapshot; the producer downloads while it loads
+                variants_by_sku, variants_by_product = await snapshot
+                while True:
+                    i, product_data = await queue.get()
+                    try:
+                        await process(i, product_data, variants_by_sku, variants_by_product)
+                    except Exception as e:
+                        # Keep the worker alive: a dead worker would leave the producer blocked on a full queue
+                        logger.error("An error occurred while processing '%s': %s", product_data.get('nombrePadre'), e)
+                    finally:
+                        queue.task_done()
+
+            # 4. Start the download and the snapshot together, and process the products with
+            # MAX_CONCURRENCY concurrent workers once the snapshot is loaded. Workers only return
+            # by failing (including when the snapshot fails), so whichever task finishes first
+            # decides how the run ends.
+            producer = asyncio.create_task(produce())
+            snapshot = asyncio.create_task(load_snapshot())
+            workers = [asyncio.create_task(work()) for _ in range(self.MAX_CONCURRENCY)]
+            try:
+                done, _ = await asyncio.wait([producer, *workers], return_when=asyncio.FIRST_COMPLETED)
+                if producer not in done:
+                    done.pop().result()
+                    raise RuntimeError("A sync worker stopped unexpectedly.")
+                processed = producer.result()
+            finally:
+                for task in (producer, snapshot, *workers):
+                    task.cancel()
+                await asyncio.gather(producer, snapshot, *workers, return_exceptions=True)
+
+            logger.info("Processed %s products from supplier.", processed)
 
         except Exception as e:
-            print(f"A critical error occurred during the sync process: {e}")
+            logger.error("A critical error occurred during the sync process: %s", e)
         finally:
             self.shopify_client.close_session()
-            print("\n--- Full Product Sync Finished ---")
+            self.promo_client.close()
+            executor.shutdown(wait=False, cancel_futures=True)
+            logger.info("--- Full Product Sync Finished ---")
+
+    @staticmethod
+    def _first_active_sku(product_data):
+        """
+        Returns the SKU of the product's first active variant, or None if it has none.
+        """
+        for hijo in product_data.get('hijos', []):
+            if hijo.get('estatus') == '1':
+                return hijo['skuHijo']
+        return None
+
+    @staticmethod
+    def _active_variants(product_data):
+        """
+        Returns the product's active supplier variants by SKU.
+        """
+        return {h['skuHijo']: h for h in product_data.get('hijos', []) if h.get('estatus') == '1'}
+
+    @staticmethod
+    def _diff_variants(supplier_variants_active, shopify_variants_by_sku):
+        """
+        Compares a product's active supplier variants with its variants in Shopify.
+        :return: A list of (sku, new_price) for the variants whose price changed,
+            and a list of the Shopify SKUs the supplier no longer offers.
+        """
+        price_updates = []
+        for sku, supplier_variant in supplier_variants_active.items():
+            if sku in shopify_variants_by_sku:
+                new_price = calculate_sale_price(supplier_variant.get('precio', 0))
+                if abs(float(shopify_variants_by_sku[sku]['price']) - new_price) > 0.01:
+                    price_updates.append((sku, new_price))
+
+        skus_to_delete = [sku for sku in shopify_variants_by_sku if sku not in supplier_variants_active]
+        return price_updates, skus_to_delete
+
+    def _process_product(self, i, product_data, shopify_variants_by_sku):
+        """
+        Creates or updates a single supplier product in Shopify.
+        :param i: The zero-based position of the product in this run.
+        :param product_data: A dictionary for a single product from PromoOptionClient.
+        :param shopify_variants_by_sku: The snapshot of the matching Shopify product's variants by SKU,
+            or None if the product does not exist in Shopify yet.
+        """
+        product_name = product_data.get('nombrePadre')
+        logger.debug("[%s] Processing: %s", i+1, product_name)
+
+        try:
+            supplier_variants_active = self._active_variants(product_data)
+            if not supplier_variants_active:
+                logger.debug("Skipping '%s' - no active variants.", product_name)
+                return
+
+            if shopify_variants_by_sku is None:
+                # 4a. CREATE new product
+                logger.info("Product not found in Shopify. Creating '%s'...", product_name)
+                self.shopify_client.create_product(product_data)
+            else:
+                # 4b. UPDATE existing product
+                product_id = next(iter(shopify_variants_by_sku.values()))['product_id']
+                logger.debug("Product found in Shopify (ID: %s). Checking for updates...", product_id)
+
+                price_updates, skus_to_delete = self._diff_variants(supplier_variants_active, shopify_variants_by_sku)
+
+                for sku, new_price in price_updates:
+                    logger.debug(
+                        "Updating price for SKU %s: %s -> %.2f", sku, shopify_variants_by_sku[sku]['price'], new_price
+                    )
+
+                if price_updates:
+                    self.shopify_client.bulk_update_variant_prices(
+                        product_id, [(shopify_variants_by_sku[sku]['variant_id'], price) for sku, price in price_updates]
+                    )
+
+                for sku in skus_to_delete:
+                    logger.debug(
+                        "Deleting discontinued variant SKU %s (ID: %s)", sku, shopify_variants_by_sku[sku]['variant_id']
+                    )
+
+                if skus_to_delete:
+                    self.shopify_client.bulk_delete_variants(
+                        product_id, [shopify_variants_by_sku[sku]['variant_id'] for sku in skus_to_delete]
+                    )
+
+        except Exception as e:
+            # One failing product must not abort the rest of the concurrent run.
+            logger.error("An error occurred while processing '%s': %s", product_name, e)
 
 
 if __name__ == '__main__':
-    manager = SyncManager()
-    # For the test run, we'll only process the first 5 products from the supplier.
-    manager.run_full_sync(product_limit=5)
+    listener = configure_logging(os.getenv("LOG_LEVEL", "INFO"))
+    try:
+        manager = SyncManager()
+        # For the test run, we'll only process the first 5 products from the supplier.
+        manager.run_full_sync(product_limit=5)
+    finally:
+        listener.stop()
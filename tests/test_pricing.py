@@ -0,0 +1,23 @@
+import pytest
+
+from pricing import calculate_sale_price
+
+
+def test_applies_discount_then_margin():
+    assert calculate_sale_price("100.00") == pytest.approx(128.3333333)
+
+
+def test_matches_the_original_two_step_formula():
+    # Folding the factors into one multiplier would print some of these a cent off
+    for cents in range(1, 200000):
+        base_price = cents / 100
+        assert f"{calculate_sale_price(f'{base_price:.2f}'):.2f}" == f"{(base_price * 0.77) / 0.60:.2f}"
+
+
+def test_float_and_string_prices_agree():
+    assert calculate_sale_price(5.1) == calculate_sale_price("5.10")
+
+
+def test_invalid_prices_yield_zero():
+    for price in (None, "", "abc"):
+        assert calculate_sale_price(price) == 0.0
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+import shopify_client
+from shopify_client import ShopifyRateLimiter
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """
+    Freezes the limiter's clock and records the sleeps it asks for instead of sleeping.
+    """
+    recorded = []
+    monkeypatch.setattr(shopify_client.time, "monotonic", lambda: 100.0)
+    monkeypatch.setattr(shopify_client.time, "sleep", recorded.append)
+    return recorded
+
+
+def throttle_status(available, maximum=1000, restore_rate=50):
+    return {"currentlyAvailable": available, "maximumAvailable": maximum, "restoreRate": restore_rate}
+
+
+def test_halves_concurrency_on_failure_down_to_one():
+    limiter = ShopifyRateLimiter(max_concurrency=16)
+    for expected in (8, 4, 2, 1, 1):
+        limiter.acquire(0)
+        limiter.release(success=False)
+        assert limiter.concurrency == expected
+
+
+def test_raises_concurrency_additively_up_to_the_maximum():
+    limiter = ShopifyRateLimiter(max_concurrency=4)
+    limiter.acquire(0)
+    limiter.release(success=False)
+    for expected in (2.5, 3.0, 3.5, 4.0, 4.0):
+        limiter.acquire(0)
+        limiter.release()
+        assert limiter.concurrency == expected
+
+
+def test_blocks_callers_beyond_the_concurrency_limit():
+    limiter = ShopifyRateLimiter(max_concurrency=1)
+    limiter.acquire(0)
+    acquired = threading.Event()
+
+    def second_caller():
+        limiter.acquire(0)
+        acquired.set()
+
+    thread = threading.Thread(target=second_caller)
+    thread.start()
+    assert not acquired.wait(0.1)
+
+    limiter.release()
+    assert acquired.wait(1)
+    thread.join()
+
+
+def test_does_not_wait_before_the_bucket_is_known(sleeps):
+    limiter = ShopifyRateLimiter()
+    limiter.acquire(500)
+    assert sleeps == []
+
+
+def test_waits_only_for_the_missing_cost(sleeps):
+    limiter = ShopifyRateLimiter()
+    limiter.acquire(10)
+    limiter.release(throttle_status=throttle_status(available=5))
+
+    limiter.acquire(30)
+    assert sleeps == [pytest.approx((30 - 5) / 50)]
+
+
+def test_reserves_cost_for_concurrent_callers(sleeps):
+    limiter = ShopifyRateLimiter()
+    limiter.acquire(10)
+    limiter.release(throttle_status=throttle_status(available=40))
+
+    limiter.acquire(30)
+    assert sleeps == []
+    # Only 10 points are left after the first reservation
+    limiter.acquire(30)
+    assert sleeps == [pytest.approx((30 - 10) / 50)]
+
+
+def test_refills_the_bucket_at_the_restore_rate(monkeypatch, sleeps):
+    limiter = ShopifyRateLimiter()
+    limiter.acquire(10)
+    limiter.release(throttle_status=throttle_status(available=0))
+
+    # One second later 50 points have been restored
+    monkeypatch.setattr(shopify_client.time, "monotonic", lambda: 101.0)
+    limiter.acquire(50)
+    assert sleeps == []
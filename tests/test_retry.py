@@ -0,0 +1,72 @@
+import urllib.error
+
+import pytest
+from tenacity import RetryCallState, Retrying
+
+from shopify_client import (
+    ShopifyClient, ShopifyThrottledError, _is_throttling_error, _is_transient_error, _should_retry
+)
+
+
+def http_error(code):
+    return urllib.error.HTTPError("https://test-store.myshopify.com", code, "error", {}, None)
+
+
+def failed_call(error, *args, **kwargs):
+    """
+    Builds the retry state of an _execute_graphql call that raised the given error.
+    """
+    retry_state = RetryCallState(Retrying(), ShopifyClient._execute_graphql.__wrapped__, (None, *args), kwargs)
+    retry_state.set_exception((type(error), error, None))
+    return retry_state
+
+
+@pytest.mark.parametrize("error", [ShopifyThrottledError("throttled"), http_error(429)])
+def test_throttling_errors(error):
+    assert _is_throttling_error(error)
+    assert _is_transient_error(error)
+
+
+@pytest.mark.parametrize("error", [
+    http_error(500), http_error(503), ConnectionError(), TimeoutError(), urllib.error.URLError("unreachable")
+])
+def test_server_and_network_errors_are_transient(error):
+    assert not _is_throttling_error(error)
+    assert _is_transient_error(error)
+
+
+@pytest.mark.parametrize("error", [http_error(400), http_error(401), ValueError("bad response")])
+def test_client_errors_are_not_transient(error):
+    assert not _is_transient_error(error)
+
+
+def test_successful_calls_are_not_retried():
+    retry_state = RetryCallState(Retrying(), ShopifyClient._execute_graphql.__wrapped__, (None, "query", "FindVariantBySku"), {})
+    retry_state.set_result({})
+    assert not _should_retry(retry_state)
+
+
+@pytest.mark.parametrize("operation_name", ["FindVariantBySku", "UpdateVariantPrices", "DeleteVariants", "CreateProduct"])
+def test_throttled_calls_are_always_retried(operation_name):
+    assert _should_retry(failed_call(http_error(429), "mutation", operation_name))
+
+
+@pytest.mark.parametrize("operation_name", ["FindVariantBySku", "UpdateVariantPrices", "DeleteVariants", "DeleteProduct"])
+def test_server_errors_are_retried_for_idempotent_operations(operation_name):
+    assert _should_retry(failed_call(http_error(503), "mutation", operation_name))
+
+
+@pytest.mark.parametrize("operation_name", ["CreateProduct", "CreateProductVariants"])
+def test_server_errors_are_not_retried_for_product_creation(operation_name):
+    assert not _should_retry(failed_call(http_error(503), "mutation", operation_name))
+    assert not _should_retry(failed_call(ConnectionError(), "mutation", operation_name))
+
+
+def test_operation_name_is_read_by_parameter_name():
+    assert not _should_retry(failed_call(http_error(503), query="mutation", operation_name="CreateProduct"))
+    assert not _should_retry(failed_call(http_error(503), "mutation", operation_name="CreateProduct", variables={}))
+    assert _should_retry(failed_call(http_error(503), operation_name="DeleteVariants", query="mutation"))
+
+
+def test_client_errors_are_not_retried():
+    assert not _should_retry(failed_call(http_error(400), "query", "FindVariantBySku"))
@@ -0,0 +1,120 @@
+import pytest
+
+from shopify_client import ShopifyClient
+
+
+PRODUCT_DATA = {
+    "skuPadre": "TSR-041", "nombrePadre": "VASO KIRA", "categorias": "BEBIDAS", "subCategorias": "VASOS",
+    "hijos": [
+        {"skuHijo": "TSR-041-PLATA", "precio": "100.00", "color": "PLATA"},
+        {"skuHijo": "TSR-041-X", "precio": "3.90", "color": None}
+    ]
+}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = ShopifyClient(shop_url="test-store.myshopify.com", api_token="shpat_test")
+    monkeypatch.setattr(client, "_filter_reachable_images", lambda urls: urls)
+    yield client
+    client.close_session()
+
+
+def fake_graphql(responses, calls):
+    def execute(query, operation_name, variables=None):
+        calls.append((operation_name, variables))
+        if isinstance(responses[operation_name], Exception):
+            raise responses[operation_name]
+        return responses[operation_name]
+    return execute
+
+
+def test_color_option_values_fall_back_to_the_sku():
+    hijos = [
+        {"skuHijo": "A-1", "color": "ROJO"},
+        {"skuHijo": "A-2", "color": None},
+        {"skuHijo": "A-3"},
+        {"skuHijo": "A-4", "color": "ROJO"}
+    ]
+    assert ShopifyClient._color_option_values(hijos) == ["ROJO", "A-2", "A-3", "A-4"]
+
+
+def test_create_product_creates_the_variants_in_one_call(client, monkeypatch):
+    calls = []
+    responses = {
+        "CreateProduct": {"data": {"productCreate": {
+            "product": {"id": "gid://shopify/Product/1", "title": "VASO KIRA"}, "userErrors": []
+        }}},
+        "CreateProductVariants": {"data": {"productVariantsBulkCreate": {
+            "productVariants": [{"id": "gid://shopify/ProductVariant/2", "sku": "TSR-041-PLATA", "price": "128.33"}],
+            "userErrors": []
+        }}}
+    }
+    monkeypatch.setattr(client, "_execute_graphql", fake_graphql(responses, calls))
+
+    created = client.create_product(PRODUCT_DATA)
+
+    assert created == {
+        "id": "1", "title": "VASO KIRA", "variants": [{"id": "2", "sku": "TSR-041-PLATA", "price": "128.33"}]
+    }
+    assert [name for name, _ in calls] == ["CreateProduct", "CreateProductVariants"]
+    variants = calls[1][1]["variants"]
+    assert variants[1] == {
+        "optionValues": [{"optionName": "Color", "name": "TSR-041-X"}],
+        "price": "5.01",
+        "inventoryItem": {"sku": "TSR-041-X", "tracked": True}
+    }
+
+
+def test_create_product_rolls_back_when_the_variants_fail(client, monkeypatch):
+    calls = []
+    responses = {
+        "CreateProduct": {"data": {"productCreate": {
+            "product": {"id": "gid://shopify/Product/1", "title": "VASO KIRA"}, "userErrors": []
+        }}},
+        "CreateProductVariants": {"data": {"productVariantsBulkCreate": {
+            "productVariants": None, "userErrors": [{"field": ["variants"], "message": "invalid"}]
+        }}},
+        "DeleteProduct": {"data": {"productDelete": {"userErrors": []}}}
+    }
+    monkeypatch.setattr(client, "_execute_graphql", fake_graphql(responses, calls))
+
+    assert client.create_product(PRODUCT_DATA) is None
+    assert calls[-1] == ("DeleteProduct", {"id": "gid://shopify/Product/1"})
+
+
+def variants_call_lost_responses(existing_skus):
+    """
+    Responses where the variants call raises a network error, after which the product has the given SKUs.
+    """
+    return {
+        "CreateProduct": {"data": {"productCreate": {
+            "product": {"id": "gid://shopify/Product/1", "title": "VASO KIRA"}, "userErrors": []
+        }}},
+        "CreateProductVariants": ConnectionError("connection reset"),
+        "ProductVariants": {"data": {"product": {"variants": {"nodes": [
+            {"id": f"gid://shopify/ProductVariant/{n}", "sku": sku, "price": "128.33"}
+            for n, sku in enumerate(existing_skus)
+        ]}}}},
+        "DeleteProduct": {"data": {"productDelete": {"userErrors": []}}}
+    }
+
+
+def test_create_product_keeps_variants_created_despite_a_network_error(client, monkeypatch):
+    calls = []
+    responses = variants_call_lost_responses(["TSR-041-PLATA", "TSR-041-X"])
+    monkeypatch.setattr(client, "_execute_graphql", fake_graphql(responses, calls))
+
+    created = client.create_product(PRODUCT_DATA)
+
+    assert [variant["sku"] for variant in created["variants"]] == ["TSR-041-PLATA", "TSR-041-X"]
+    assert "DeleteProduct" not in [name for name, _ in calls]
+
+
+def test_create_product_rolls_back_when_a_network_error_lost_the_variants(client, monkeypatch):
+    calls = []
+    responses = variants_call_lost_responses([""])
+    monkeypatch.setattr(client, "_execute_graphql", fake_graphql(responses, calls))
+
+    assert client.create_product(PRODUCT_DATA) is None
+    assert calls[-1] == ("DeleteProduct", {"id": "gid://shopify/Product/1"})
@@ -0,0 +1,161 @@
+import os
+import threading
+
+from sync_manager import SyncManager
+
+
+SUPPLIER_VARIANTS = {
+    "A-1": {"skuHijo": "A-1", "precio": "100.00", "estatus": "1"},
+    "A-2": {"skuHijo": "A-2", "precio": "3.90", "estatus": "1"}
+}
+
+
+def shopify_variants(**prices):
+    return {
+        sku.replace("_", "-"): {"variant_id": str(n), "product_id": "7", "price": price}
+        for n, (sku, price) in enumerate(prices.items())
+    }
+
+
+def test_active_variants_keep_only_active_children():
+    product_data = {"hijos": [{"skuHijo": "A-1", "estatus": "1"}, {"skuHijo": "A-2", "estatus": "0"}]}
+    assert list(SyncManager._active_variants(product_data)) == ["A-1"]
+
+
+def test_diff_finds_price_changes_and_discontinued_variants():
+    price_updates, skus_to_delete = SyncManager._diff_variants(
+        SUPPLIER_VARIANTS, shopify_variants(A_1="128.33", A_2="4.50", A_3="1.00")
+    )
+    assert [(sku, f"{price:.2f}") for sku, price in price_updates] == [("A-2", "5.01")]
+    assert skus_to_delete == ["A-3"]
+
+
+def test_diff_ignores_sub_cent_price_differences():
+    price_updates, skus_to_delete = SyncManager._diff_variants(SUPPLIER_VARIANTS, shopify_variants(A_1="128.33", A_2="5.01"))
+    assert price_updates == []
+    assert skus_to_delete == []
+
+
+class FakePromoClient:
+    def __init__(self, count, fail_after=None):
+        self.count = count
+        self.fail_after = fail_after
+
+    def iter_products(self):
+        for n in range(self.count):
+            if n == self.fail_after:
+                raise Exception("download interrupted")
+            yield {"skuPadre": f"P-{n}", "nombrePadre": f"Product {n}",
+                   "hijos": [{"skuHijo": f"P-{n}-1", "precio": "10.00", "estatus": "1"}]}
+
+    def close(self):
+        pass
+
+
+class FakeShopifyClient:
+    def __init__(self):
+        self.created = []
+
+    def snapshot_promo_variants(self):
+        return {}
+
+    def create_product(self, product_data):
+        self.created.append(product_data["skuPadre"])
+        return {"id": "1", "variants": []}
+
+    def close_session(self):
+        pass
+
+
+def make_manager(promo_client, shopify_client):
+    manager = SyncManager.__new__(SyncManager)
+    manager.promo_client = promo_client
+    manager.shopify_client = shopify_client
+    return manager
+
+
+def test_sync_processes_every_streamed_product():
+    shopify_client = FakeShopifyClient()
+    manager = make_manager(FakePromoClient(1200), shopify_client)
+
+    manager.run_full_sync()
+
+    assert len(shopify_client.created) == 1200
+
+
+def test_sync_finishes_when_processing_raises(caplog):
+    shopify_client = FakeShopifyClient()
+    # More products than the queue and the workers can hold, so a dead worker would block the producer
+    manager = make_manager(FakePromoClient(SyncManager.QUEUE_SIZE * 2), shopify_client)
+
+    def fail(i, product_data, shopify_variants_by_sku):
+        raise Exception("unexpected failure")
+    manager._process_product = fail
+
+    manager.run_full_sync()
+
+    assert "unexpected failure" in caplog.text
+    assert shopify_client.created == []
+
+
+def test_sync_stops_when_the_download_fails(caplog):
+    manager = make_manager(FakePromoClient(100, fail_after=60), FakeShopifyClient())
+
+    manager.run_full_sync()
+
+    assert "download interrupted" in caplog.text
+
+
+def test_sync_runs_max_concurrency_products_at_once(monkeypatch):
+    # On a single CPU asyncio's own default executor would only have 5 threads
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    barrier = threading.Barrier(SyncManager.MAX_CONCURRENCY, timeout=5)
+
+    class BlockingShopifyClient(FakeShopifyClient):
+        def create_product(self, product_data):
+            barrier.wait()
+            return super().create_product(product_data)
+
+    shopify_client = BlockingShopifyClient()
+    manager = make_manager(FakePromoClient(SyncManager.MAX_CONCURRENCY), shopify_client)
+
+    manager.run_full_sync()
+
+    assert len(shopify_client.created) == SyncManager.MAX_CONCURRENCY
+
+
+def test_catalog_download_overlaps_the_snapshot():
+    download_started = threading.Event()
+
+    class SignallingPromoClient(FakePromoClient):
+        def iter_products(self):
+            download_started.set()
+            yield from super().iter_products()
+
+    class SlowSnapshotShopifyClient(FakeShopifyClient):
+        def snapshot_promo_variants(self):
+            # The snapshot only completes if the catalog download started while it was loading
+            if not download_started.wait(timeout=5):
+                raise Exception("catalog download did not start during the snapshot")
+            return {}
+
+    shopify_client = SlowSnapshotShopifyClient()
+    manager = make_manager(SignallingPromoClient(10), shopify_client)
+
+    manager.run_full_sync()
+
+    assert len(shopify_client.created) == 10
+
+
+def test_sync_stops_when_the_snapshot_fails(caplog):
+    class FailingSnapshotShopifyClient(FakeShopifyClient):
+        def snapshot_promo_variants(self):
+            raise Exception("snapshot failed")
+
+    shopify_client = FailingSnapshotShopifyClient()
+    manager = make_manager(FakePromoClient(SyncManager.QUEUE_SIZE * 2), shopify_client)
+
+    manager.run_full_sync()
+
+    assert "snapshot failed" in caplog.text
+    assert shopify_client.created == []